@@ -1,13 +1,25 @@
 import os
 import re
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_FILENAME_PATTERN = r"^[\w\-.]+\.csv$"
+_DEFAULT_FILENAME_RE = re.compile(DEFAULT_FILENAME_PATTERN)
+
+
+@lru_cache(maxsize=16)
+def _compile_pattern(pattern: str) -> re.Pattern:
+    """Compiles and caches a caller-supplied filename pattern."""
+    return re.compile(pattern)
+
 
 class FileManager:
     """A class for storing and retrieving a filename in a specified file path."""
 
+    _known_dirs: set[str] = set()
+
     @staticmethod
     def get_last_processed_file(file_path: str) -> str | None:
         """Reads and returns the content (typically a filename) from the specified file path.
@@ -19,28 +31,28 @@ class FileManager:
             str | None: The stored filename (stripped of whitespace), or raises an exception on error.
 
         Raises:
-            RuntimeError: If there is a problem reading the file (e.g., it doesn't exist or is inaccessible).
+            RuntimeError: If there is a problem reading the file (e.g., it is inaccessible). A missing file returns None.
         """
         try:
-            if not os.path.exists(file_path):
-                logger.warning(f"⚠️ Last processed file record not found at: {file_path}")
-                return None
-
             with open(file_path, "r") as f:
                 filename = f.read().strip()
 
-            if filename:
-                logger.info(f"📖 Loaded last processed file: {filename}")
-            else:
-                logger.info(f"🕳️ File {file_path} exists but is empty.")
-            return filename
+        except FileNotFoundError:
+            logger.warning(f"⚠️ Last processed file record not found at: {file_path}")
+            return None
 
         except (OSError, IOError) as e:
             logger.error(f"❌ Error reading file {file_path}: {e}")
             raise RuntimeError(f"Error reading file {file_path}: {e}") from e
 
+        if filename:
+            logger.info(f"📖 Loaded last processed file: {filename}")
+        else:
+            logger.info(f"🕳️ File {file_path} exists but is empty.")
+        return filename
+
     @staticmethod
-    def set_last_processed_file(filename: str, file_path: str, filename_pattern: str = r"^[\w\-.]+\.csv$") -> None:
+    def set_last_processed_file(filename: str, file_path: str, filename_pattern: str = DEFAULT_FILENAME_PATTERN) -> None:
         """Writes the provided filename to the specified file path.
 
         Validates that the filename matches the expected pattern (default: .csv filenames).
@@ -54,21 +66,37 @@ class FileManager:
             ValueError: If the filename format is invalid.
             OSError: If there is a problem writing to the file.
         """
-        if not re.fullmatch(filename_pattern, filename):
+        if filename_pattern == DEFAULT_FILENAME_PATTERN:
+            compiled_pattern = _DEFAULT_FILENAME_RE
+        else:
+            compiled_pattern = _compile_pattern(filename_pattern)
+
+        if not compiled_pattern.fullmatch(filename):
             logger.error(f"🚫 Invalid filename format: {filename}. Must match pattern: {filename_pattern}")
             raise ValueError(f"Invalid filename format: {filename}. Must match pattern: {filename_pattern}")
 
         try:
             dir_path = os.path.dirname(file_path)
-            if dir_path and not os.path.exists(dir_path):
+            if dir_path and dir_path not in FileManager._known_dirs:
                 os.makedirs(dir_path, exist_ok=True)
-                logger.info(f"📂 Created directory for record file: {dir_path}")
-
-            with open(file_path, "w") as f:
-                f.write(filename)
+                FileManager._known_dirs.add(dir_path)
+                logger.info(f"📂 Ensured directory for record file: {dir_path}")
+
+            try:
+                with open(file_path, "w") as f:
+                    f.write(filename)
+            except FileNotFoundError:
+                if not dir_path:
+                    raise
+                # The cached directory was removed externally: recreate it and retry once.
+                os.makedirs(dir_path, exist_ok=True)
+                logger.info(f"📂 Recreated missing directory for record file: {dir_path}")
+                with open(file_path, "w") as f:
+                    f.write(filename)
 
             logger.info(f"📝 Updated last processed file: {filename} → {file_path}")
 
         except OSError as e:
+            FileManager._known_dirs.discard(os.path.dirname(file_path))
             logger.exception(f"❌ Error writing to file {file_path}: {e}")
             raise OSError(f"Error writing file {file_path}: {e}") from e
@@ -1,12 +1,20 @@
 import os
+import importlib.util
+import numpy as np
 import pandas as pd
 import json
+import math
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
-from typing import Self, Callable
-import joblib
+from typing import ClassVar, Self, Callable
 from pathlib import Path
 import logging
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
@@ -21,21 +29,73 @@ CATEGORY_MAPPING = {
 
 REPORT_FILE = "sales_report.json"
 
+# Built once: category codes are resolved by position against these.
+_CATEGORY_CODES = pd.Index(list(CATEGORY_MAPPING))
+_CATEGORY_NAMES = list(CATEGORY_MAPPING.values())
+
+_CSV_DTYPES = {
+    "Region": "category",
+    "Product Category": "category",
+    "Product": "category",
+}
+_CSV_DATE_COLUMNS = ["Date"]
+_MAX_READ_WORKERS = 8
+# Comparison methods shared by pandas Series (Series.gt, Series.ge, ...).
+_FILTER_OPS = frozenset({"gt", "ge", "lt", "le", "eq", "ne"})
+# pandas' pyarrow CSV engine parses multithreaded; use it only when pyarrow is installed.
+_CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
+
+
+def _json_safe(value):
+    """Recursively prepares report data so both JSON writers produce the same output.
+
+    Non-string dict keys (e.g. dates) are converted with ``str``, which the standard
+    json module would otherwise reject. NumPy scalars become Python scalars, NaN and
+    infinite floats become None (``null``), and dates are written with ``str``.
+    """
+    if isinstance(value, dict):
+        return {key if isinstance(key, str) else str(key): _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, date):
+        return str(value)
+    return value
+
 
 class DataProcessor:
     """🧩 Handles preprocessing, filtering and category mapping of sales data."""
 
     @staticmethod
-    def filter_data(df: pd.DataFrame, filter_func: Callable[[pd.DataFrame], pd.DataFrame] | None) -> pd.DataFrame:
+    def filter_data(df: pd.DataFrame,
+                    filter_func: Callable[[pd.DataFrame], pd.DataFrame] | tuple[str, str, object] | None) -> pd.DataFrame:
         """Applies an optional filtering function.
 
+        A ``(column, op, value)`` tuple, e.g. ``("Sales", "gt", 150)``, is applied as a
+        single vectorized Series comparison (``Series.gt`` etc.), so datetime, categorical
+        and nullable columns follow the usual pandas comparison rules.
+        Supported ops: gt, ge, lt, le, eq, ne.
+
         Args:
             df (pd.DataFrame): Input data.
-            filter_func (Callable[[pd.DataFrame], pd.DataFrame] | None): Function to filter rows.
+            filter_func (Callable[[pd.DataFrame], pd.DataFrame] | tuple[str, str, object] | None):
+                Function to filter rows, or a ``(column, op, value)`` comparison.
 
         Returns:
             pd.DataFrame: Filtered data.
+
+        Raises:
+            ValueError: If a comparison tuple uses an unsupported op.
         """
+        if isinstance(filter_func, tuple):
+            column, op, value = filter_func
+            if op not in _FILTER_OPS:
+                raise ValueError(f"Unsupported filter op: {op!r}")
+            logger.info(f"🧹 Applying filter: {column} {op} {value}")
+            return df[getattr(df[column], op)(value)]
         if filter_func:
             logger.info("🧹 Applying custom data filter...")
             return filter_func(df)
@@ -44,11 +104,68 @@ class DataProcessor:
 
     @staticmethod
     def map_categories(df: pd.DataFrame) -> pd.DataFrame:
-        """Maps product categories (AA, AB...) to descriptive names."""
-        df["Product Category Mapped"] = df["Product Category"].map(CATEGORY_MAPPING)
+        """Maps product categories (AA, AB...) to descriptive names.
+
+        Codes are resolved to positions in CATEGORY_MAPPING and reused as Categorical
+        codes, so no per-row dictionary lookup is needed. Unknown codes map to NaN.
+        """
+        codes = _CATEGORY_CODES.get_indexer(df["Product Category"])
+        df["Product Category"] = df["Product Category"].astype("category")
+        df["Product Category Mapped"] = pd.Categorical.from_codes(codes, categories=_CATEGORY_NAMES)
         logger.info("🔤 Product categories mapped to descriptive names.")
         return df
 
+    @staticmethod
+    def concat_frames(data_frames: list[pd.DataFrame]) -> pd.DataFrame:
+        """Concatenates DataFrames without losing categorical dtypes.
+
+        pandas falls back to plain values when categoricals with different categories
+        are concatenated, so columns that are categorical in every frame are first
+        recoded onto the union of their categories.
+
+        Args:
+            data_frames (list[pd.DataFrame]): Frames to concatenate, in order.
+
+        Returns:
+            pd.DataFrame: The concatenated frame with a fresh index.
+        """
+        unified_dtypes = {}
+        for column in data_frames[0].columns:
+            dtypes = [df[column].dtype if column in df.columns else None for df in data_frames]
+            if not all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+                continue
+            if all(dtype == dtypes[0] for dtype in dtypes[1:]):
+                continue
+            categories = dtypes[0].categories.append([dtype.categories for dtype in dtypes[1:]]).unique()
+            unified_dtypes[column] = pd.CategoricalDtype(categories)
+
+        if unified_dtypes:
+            data_frames = [df.astype(unified_dtypes) for df in data_frames]
+        return pd.concat(data_frames, ignore_index=True)
+
+    @staticmethod
+    def read_sales_file(file_path: str) -> pd.DataFrame:
+        """Reads a single sales CSV with typed columns and parsed dates."""
+        logger.info(f"📥 Loading file: {os.path.basename(file_path)}")
+        return pd.read_csv(file_path, dtype=_CSV_DTYPES, parse_dates=_CSV_DATE_COLUMNS, engine=_CSV_ENGINE)
+
+    @staticmethod
+    def read_sales_files(directory_path: str, file_names: list) -> list[pd.DataFrame]:
+        """Reads several sales CSVs concurrently.
+
+        Args:
+            directory_path (str): Directory containing the files.
+            file_names (list): Names of the files to read.
+
+        Returns:
+            list[pd.DataFrame]: One DataFrame per file, in the order of ``file_names``.
+        """
+        if not file_names:
+            return []
+        file_paths = [os.path.join(directory_path, file_name) for file_name in file_names]
+        with ThreadPoolExecutor(max_workers=min(_MAX_READ_WORKERS, len(file_paths))) as executor:
+            return list(executor.map(DataProcessor.read_sales_file, file_paths))
+
 
 @dataclass
 class ReportGenerator:
@@ -57,21 +174,20 @@ class ReportGenerator:
     report_dataframe: pd.DataFrame
     report_dict: dict[str, pd.DataFrame] = field(default_factory=dict)
 
+    # Loaded model bundles keyed by (resolved path, mtime) so reruns skip unpickling.
+    _MODEL_CACHE: ClassVar[dict[tuple[str, float], dict]] = {}
+
     # ================================================================
     # INITIAL DATAFRAME CREATION
     # ================================================================
     @classmethod
     def create_first_dataframe(cls, directory_path: str, file_names: list) -> Self:
         """Creates the initial DataFrame and immediately runs anomaly detection."""
-        data_frames = []
-        for file_name in file_names:
-            file_path = os.path.join(directory_path, file_name)
-            logger.info(f"📥 Loading initial file: {file_name}")
-            df = pd.read_csv(file_path)
-            df = DataProcessor.map_categories(df)
-            data_frames.append(df)
-
-        report_dataframe = pd.concat(data_frames, ignore_index=True)
+        logger.info(f"📥 Loading {len(file_names)} initial file(s)...")
+        data_frames = DataProcessor.read_sales_files(directory_path, file_names)
+
+        # Categories are mapped once on the combined frame rather than per file.
+        report_dataframe = DataProcessor.map_categories(DataProcessor.concat_frames(data_frames))
         logger.info(f"✅ Created initial report DataFrame with shape: {report_dataframe.shape}")
 
         instance = ReportGenerator(report_dataframe)
@@ -90,20 +206,16 @@ class ReportGenerator:
     # ================================================================
     def update_dataframe(self, directory_path: str, file_names: list) -> None:
         """Updates the DataFrame with new files and recalculates anomalies."""
-        data_frames = []
-        for file_name in file_names:
-            file_path = os.path.join(directory_path, file_name)
-            logger.info(f"📥 Loading update file: {file_name}")
-            df = pd.read_csv(file_path)
-            df = DataProcessor.map_categories(df)
-            data_frames.append(df)
+        logger.info(f"📥 Loading {len(file_names)} update file(s)...")
+        data_frames = DataProcessor.read_sales_files(directory_path, file_names)
 
         if not data_frames:
             logger.warning("⚠️ No new data files found for update.")
             return
 
-        new_data = pd.concat(data_frames, ignore_index=True)
-        self.report_dataframe = pd.concat([self.report_dataframe, new_data], ignore_index=True)
+        # New files are mapped individually so the history is concatenated only once.
+        mapped_frames = [DataProcessor.map_categories(df) for df in data_frames]
+        self.report_dataframe = DataProcessor.concat_frames([self.report_dataframe, *mapped_frames])
         logger.info(f"📈 Updated report DataFrame shape: {self.report_dataframe.shape}")
 
         try:
@@ -116,9 +228,24 @@ class ReportGenerator:
     # ================================================================
     # ANOMALY DETECTION
     # ================================================================
-    def _detect_anomalies(self, model_path: str | Path | None = None) -> None:
-        """Loads pretrained IsolationForest models and flags anomalies."""
-        df = self.report_dataframe.copy()
+    def _detect_anomalies(self, model_path: str | Path | None = None, rows: np.ndarray | None = None) -> None:
+        """Loads pretrained IsolationForest models and flags anomalies.
+
+        Args:
+            model_path (str | Path | None): Path to pretrained models.
+            rows (np.ndarray | None): Positions of the rows to score (all rows if None).
+                Flags of rows outside this selection are left unchanged.
+        """
+        import joblib  # deferred: only needed when models are actually loaded
+
+        df = self.report_dataframe
+        if rows is None:
+            rows = np.arange(len(df))
+
+        if "is_anomaly" in df.columns:
+            flags = df["is_anomaly"].fillna(0).to_numpy(dtype=np.int8, copy=True)
+        else:
+            flags = np.zeros(len(df), dtype=np.int8)
 
         if model_path is None: #pragma: no cover
             model_path = Path(__file__).resolve().parent.parent / "app" / "models" / "category_anomaly_models.pkl"
@@ -128,49 +255,55 @@ class ReportGenerator:
 
         if not path.exists():
             logger.error(f"❌ Model file not found at: {path}")
-            df["is_anomaly"] = 0
-            self.report_dataframe = df
+            flags[rows] = 0
+            df["is_anomaly"] = flags
             return
 
         try:
-            models = joblib.load(path)
+            cache_key = (str(path), path.stat().st_mtime)
+            models = ReportGenerator._MODEL_CACHE.get(cache_key)
+            if models is None:
+                models = joblib.load(path)
+                for stale_key in [key for key in ReportGenerator._MODEL_CACHE if key[0] == cache_key[0]]:
+                    del ReportGenerator._MODEL_CACHE[stale_key]
+                ReportGenerator._MODEL_CACHE[cache_key] = models
             if not isinstance(models, dict) or len(models) == 0:
                 logger.warning(f"⚠️ Loaded model file is empty or invalid: {path}")
-                df["is_anomaly"] = 0
-                self.report_dataframe = df
+                flags[rows] = 0
+                df["is_anomaly"] = flags
                 return
             logger.info(f"✅ Loaded {len(models)} category models: {list(models.keys())}")
         except Exception as e:
             logger.exception(f"❌ Error loading model from {path}: {e}")
-            df["is_anomaly"] = 0
-            self.report_dataframe = df
+            flags[rows] = 0
+            df["is_anomaly"] = flags
             return
 
-        if "is_anomaly" not in df.columns:
-            df["is_anomaly"] = 0
-
         if "Product Category Mapped" not in df.columns:
             logger.warning("⚠️ Missing column 'Product Category Mapped' — mapping required before detection.")
-            self.report_dataframe = df
+            df["is_anomaly"] = flags
             return
 
+        categories = df["Product Category Mapped"].iloc[rows]
+        sales = df[["Sales"]].iloc[rows]
+
         total_anomalies = 0
-        for category, idx in df.groupby("Product Category Mapped").groups.items():
+        for category, positions in categories.groupby(categories, sort=False, observed=True).indices.items():
             model = models.get(category)
             if model is None:
                 logger.warning(f"⚠️ No model found for category '{category}'")
                 continue
             try:
-                preds = model.predict(df.loc[idx, ["Sales"]])
-                anomalies = int((preds == -1).sum())
+                is_anomaly = model.predict(sales.iloc[positions]) == -1
+                anomalies = int(is_anomaly.sum())
                 total_anomalies += anomalies
                 logger.info(f"🧠 {category:25s} — {anomalies} anomalies detected.")
-                df.loc[idx, "is_anomaly"] = (preds == -1).astype(int)
+                flags[rows[positions]] = is_anomaly
             except Exception as e:
                 logger.exception(f"❌ Error predicting anomalies for {category}: {e}")
 
         logger.info(f"📊 Total anomalies detected: {total_anomalies}")
-        self.report_dataframe = df
+        df["is_anomaly"] = flags
 
     # ================================================================
     # REPORT GENERATION
@@ -186,41 +319,46 @@ class ReportGenerator:
         Returns:
             dict[str, pd.DataFrame]: Aggregated reports with anomaly summary.
         """
-        if run_anomaly_detection:
-            self._detect_anomalies(model_path=model_path)
+        df = self.report_dataframe
+        if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
 
-        df = self.report_dataframe.copy()
-        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-
-        # --- 🔄 Filter last 30 days
-        today = datetime.now().date()
+        # --- 🔄 Filter last 30 days (only these rows are scored and reported)
+        today = pd.Timestamp(datetime.now().date())
         cutoff = today - timedelta(days=30)
+        in_window = (df["Date"] >= cutoff).to_numpy()
 
-        # Upewniamy się, że Date jest datą (bez Timestamp)
-        df["Date"] = pd.to_datetime(df["Date"]).dt.date
+        if run_anomaly_detection:
+            self._detect_anomalies(model_path=model_path, rows=np.flatnonzero(in_window))
 
-        df_30 = df[df["Date"] >= cutoff]
+        df_30 = df[in_window]
         logger.info(f"📅 Filtered last 30 days: {df_30.shape[0]} records remaining.")
         # --- 📊 Aggregate reports
+        beverage_stats = df_30.groupby("Product Category Mapped", observed=True)["Sales"].agg(["sum", "mean"])
         self.report_dict = {
-            "region_report_mean": df_30.groupby(["Region"])["Sales"].mean().round(2).to_dict(),
-            "beverage_report_total": df_30.groupby(["Product Category Mapped"])["Sales"].sum().astype(int).to_dict(),
-            "beverage_report_mean": df_30.groupby(["Product Category Mapped"])["Sales"].mean().round(2).to_dict(),
+            "region_report_mean": df_30.groupby("Region", observed=True)["Sales"].mean().round(2).to_dict(),
+            "beverage_report_total": beverage_stats["sum"].astype(int).to_dict(),
+            "beverage_report_mean": beverage_stats["mean"].round(2).to_dict(),
         }
 
         # --- 🧠 Anomalies: only today's anomalies detected by the model
-        today_anoms = df_30[(df_30["is_anomaly"] == 1) & (df_30["Date"] == today)]
+        is_today = (df_30["Date"] >= today) & (df_30["Date"] < today + timedelta(days=1))
+        today_anoms = df_30[(df_30["is_anomaly"] == 1) & is_today]
 
         if not today_anoms.empty:
+            today_anoms = today_anoms.assign(Date=today_anoms["Date"].dt.date)
             total_anomalies = len(today_anoms)
 
             logger.info(f"📈 Today's anomalies detected by model: {total_anomalies}")
             logger.info(
                 f"🧾 Full list of anomalies:\n{today_anoms[['Date', 'Region', 'Product', 'Sales']].to_string(index=False)}")
 
+            # Convert column-wise (one tolist() per column) instead of boxing every cell.
+            columns = list(today_anoms.columns)
+            column_values = [today_anoms[column].tolist() for column in columns]
             self.report_dict["today_anomalies"] = {
                 "total_anomalies": total_anomalies,
-                "records": today_anoms.to_dict(orient="records"),
+                "records": [dict(zip(columns, row)) for row in zip(*column_values)],
             }
         else:
             logger.info("✅ No anomalies detected today.")
@@ -236,10 +374,24 @@ class ReportGenerator:
     # REPORT SAVING
     # ================================================================
     def save_report(self, file_name: str = REPORT_FILE) -> None:
-        """Saves the generated report as JSON."""
+        """Saves the generated report as JSON.
+
+        Uses orjson when it is installed and falls back to the standard json module.
+        Both write the same two-space indented layout from the same normalized data,
+        so missing values are always written as ``null``.
+        """
         logger.info(f"💾 PRINT DICT: {self.report_dict}")
-        json_object = json.dumps(self.report_dict, indent=4, default=str)
-        with open(file_name, "w") as outfile:
-            outfile.write(json_object)
+        report = _json_safe(self.report_dict)
+        if orjson is not None:
+            payload = orjson.dumps(
+                report,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            )
+            with open(file_name, "wb") as outfile:
+                outfile.write(payload)
+        else:
+            with open(file_name, "w") as outfile:
+                json.dump(report, outfile, indent=2, default=str, allow_nan=False)
         logger.info(f"💾 Report successfully saved to: {file_name}")
 
@@ -1,8 +1,11 @@
 from app.file_process.file_manager import FileManager
 from app.file_process.report_generator import ReportGenerator
+from collections.abc import Container
 from dataclasses import dataclass, field
+from functools import lru_cache
 import re
 import shutil
+import time
 from datetime import datetime
 import os
 import logging
@@ -11,6 +14,18 @@ logger = logging.getLogger(__name__)
 
 LAST_FILE_RECORD = "data/Sabores Ibéricos Company Transaction Data/last_processed.txt"
 
+_DATE_RE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+# A directory mtime this recent may still be shared by a file created right after the stat.
+_MTIME_RACE_WINDOW_NS = 2_000_000_000
+
+
+@lru_cache(maxsize=4096)
+def _parse_filename_date(filename: str) -> datetime | None:
+    """Parses and caches the 'YYYY-MM-DD' date embedded in a filename."""
+    match = _DATE_RE.search(filename)
+    return datetime(int(match[1]), int(match[2]), int(match[3])) if match else None
+
 
 @dataclass
 class SalesMonitor:
@@ -27,6 +42,8 @@ class SalesMonitor:
     record_file_path: str
     all_files: dict = field(init=False, default_factory=dict)
     report_generator: ReportGenerator = None
+    _last_processed_date: datetime | None = field(init=False, default=None, repr=False)
+    _directory_mtime_ns: int | None = field(init=False, default=None, repr=False)
 
     def __post_init__(self):
         """Initializes the SalesMonitor instance by loading all files and setting up the report generator."""
@@ -42,47 +59,76 @@ class SalesMonitor:
     @staticmethod
     def extract_date_from_filename(filename: str) -> datetime | None:
         """Extracts the date from a filename in the format 'YYYY-MM-DD'."""
-        match = re.search(r'(\d{4})-(\d{2})-(\d{2})', filename)
-        if match:
-            return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
-        return None
+        return _parse_filename_date(filename)
+
+    def _get_last_processed_date(self) -> datetime | None:
+        """Returns the date of the last processed file, reading the record file only when not cached."""
+        if self._last_processed_date is None:
+            last_processed_file = FileManager.get_last_processed_file(self.record_file_path)
+            logger.info(f"🕐 Last processed file: {last_processed_file}")
+            if last_processed_file:
+                self._last_processed_date = self.extract_date_from_filename(last_processed_file)
+        return self._last_processed_date
 
-    def _get_files_since(self, date: datetime | None) -> dict:
-        """Fetches files in the directory that are newer than the provided date."""
+    def _get_directory_mtime_ns(self) -> int | None:
+        """Returns the directory mtime, or None when it is unreadable or too recent to trust."""
         try:
-            files = {
-                f: self.extract_date_from_filename(f)
-                for f in os.listdir(self.directory)
-                if f.endswith(".csv") and self.extract_date_from_filename(f) is not None
-            }
+            mtime_ns = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return None
+        if time.time_ns() - mtime_ns < _MTIME_RACE_WINDOW_NS:
+            return None
+        return mtime_ns
+
+    def _get_files_since(self, date: datetime | None, exclude: Container[str] = ()) -> dict | None:
+        """Fetches files in the directory that are newer than the provided date.
+
+        Filenames in ``exclude`` (e.g. files already processed) are skipped before
+        any date parsing, so only unseen files are parsed and sorted.
+
+        Returns:
+            dict | None: Matching filenames mapped to their dates, sorted by date,
+                or None if the directory could not be scanned.
+        """
+        try:
+            files = {}
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name in exclude or not entry.name.endswith(".csv") or not entry.is_file():
+                        continue
+                    file_date = self.extract_date_from_filename(entry.name)
+                    if file_date is None or (date and file_date <= date):
+                        continue
+                    files[entry.name] = file_date
             files = dict(sorted(files.items(), key=lambda item: item[1]))
 
-            if date:
-                files = {f: d for f, d in files.items() if d > date}
-
             logger.info(f"📂 Found {len(files)} CSV files in directory: {self.directory}")
             return files
         except FileNotFoundError:
             logger.warning(f"⚠️ Directory not found: {self.directory}")
-            return {}
+            return None
         except Exception as e:
             logger.exception(f"❌ Error reading directory {self.directory}: {e}")
-            return {}
+            return None
 
     def process_new_files(self):
         """Processes any new files that were added to the directory after the last processed file."""
         logger.info("🔍 Checking for new files to process...")
 
         try:
-            last_processed_file = FileManager.get_last_processed_file(self.record_file_path)
-            logger.info(f"🕐 Last processed file: {last_processed_file}")
+            directory_mtime_ns = self._get_directory_mtime_ns()
+            if directory_mtime_ns is not None and directory_mtime_ns == self._directory_mtime_ns:
+                logger.info("ℹ️ Directory unchanged since last scan. Everything is up to date.")
+                return
 
-            last_date = self.extract_date_from_filename(last_processed_file) if last_processed_file else None
-            new_files = self._get_files_since(last_date)
+            last_date = self._get_last_processed_date()
+            new_files = self._get_files_since(last_date, exclude=self.all_files)
+            if new_files is None:
+                # Scan failed: leave the directory mtime unrecorded so the next poll rescans.
+                return
 
             if new_files:
                 logger.info(f"🆕 Found new files: {list(new_files.keys())}")
-                self.all_files.update(new_files)
 
                 logger.info("🧾 Archiving previous report before generating a new one...")
                 self._archive_old_report()
@@ -98,10 +144,14 @@ class SalesMonitor:
 
                 last_processed_file = list(new_files.keys())[-1]
                 FileManager.set_last_processed_file(last_processed_file, self.record_file_path)
+                self._last_processed_date = new_files[last_processed_file]
+                self.all_files.update(new_files)
+                self._directory_mtime_ns = directory_mtime_ns
                 logger.info(f"✅ Updated last processed file: {last_processed_file}")
                 logger.info("🏁 Report generation and update completed successfully.")
             else:
                 logger.info("ℹ️ No new files detected. Everything is up to date.")
+                self._directory_mtime_ns = directory_mtime_ns
 
         except Exception as e:
             logger.exception(f"❌ Error while processing new files: {e}")
@@ -110,11 +160,12 @@ class SalesMonitor:
         """Initializes the monitor by loading all files and generating the first report."""
         logger.info("📂 Loading all CSV files for initialization...")
         try:
-            self.all_files = self._get_files_since(None)
+            self.all_files = self._get_files_since(None) or {}
 
             if self.all_files:
                 last_processed_file = list(self.all_files.keys())[-1]
                 FileManager.set_last_processed_file(last_processed_file, self.record_file_path)
+                self._last_processed_date = self.all_files[last_processed_file]
                 logger.info(f"🕒 Set last processed file: {last_processed_file}")
 
                 logger.info("📈 Creating initial DataFrame and generating first report...")
@@ -128,7 +179,11 @@ class SalesMonitor:
             logger.exception(f"❌ Error during initial report generation: {e}")
 
     def _archive_old_report(self):
-        """Creates a timestamped copy of the current report before it's overwritten."""
+        """Archives the current report under a timestamped name before it's regenerated.
+
+        Reports are copied rather than moved, so the previous report stays in place
+        if the update or save that follows fails.
+        """
         try:
             report_json = "sales_report.json"
             report_csv = "sales_report.csv"
@@ -139,12 +194,12 @@ class SalesMonitor:
 
             if os.path.exists(report_json):
                 dst_json = os.path.join(archive_dir, f"sales_report_{timestamp}.json")
-                shutil.copy2(report_json, dst_json)
+                shutil.copyfile(report_json, dst_json)
                 logger.info(f"🧾 Archived previous JSON report → {dst_json}")
 
             if os.path.exists(report_csv):
                 dst_csv = os.path.join(archive_dir, f"sales_report_{timestamp}.csv")
-                shutil.copy2(report_csv, dst_csv)
+                shutil.copyfile(report_csv, dst_csv)
                 logger.info(f"📊 Archived previous CSV report → {dst_csv}")
 
         except Exception as e:
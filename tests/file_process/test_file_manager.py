@@ -1,14 +1,22 @@
 import os
-import tempfile
+import re
+import shutil
+from pathlib import Path
 import pytest
-from app.file_process.file_manager import FileManager   # adjust import if needed
-import logging
+from app.file_process.file_manager import FileManager, DEFAULT_FILENAME_PATTERN   # adjust import if needed
+
+@pytest.fixture(scope="module")
+def module_dir(tmp_path_factory):
+    """Creates one temporary base directory for the tests in this module."""
+    return tmp_path_factory.mktemp("file_manager")
+
 
 @pytest.fixture
-def temp_dir():
-    """Creates a temporary working directory."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        yield tmpdir
+def temp_dir(module_dir, request):
+    """Gives each test its own subdirectory of the module-scoped base directory."""
+    test_dir = module_dir / re.sub(r"\W", "_", request.node.name)
+    test_dir.mkdir()
+    return str(test_dir)
 
 
 # ---------- GET TESTS ----------
@@ -16,8 +24,7 @@ def temp_dir():
 def test_get_last_processed_file_returns_filename(temp_dir):
     """Should return the stored filename when the file exists and contains text."""
     file_path = os.path.join(temp_dir, "record.txt")
-    with open(file_path, "w") as f:
-        f.write("data_2025_11.csv")
+    Path(file_path).write_text("data_2025_11.csv")
 
     result = FileManager.get_last_processed_file(file_path)
     assert result == "data_2025_11.csv"
@@ -26,8 +33,7 @@ def test_get_last_processed_file_returns_filename(temp_dir):
 def test_get_last_processed_file_empty_file(temp_dir, caplog):
     """Should return an empty string and log info when the file exists but is empty."""
     file_path = os.path.join(temp_dir, "record.txt")
-    open(file_path, "w").close()  # create empty file
-    caplog.set_level(logging.INFO)
+    Path(file_path).touch()  # create empty file
     result = FileManager.get_last_processed_file(file_path)
     assert result == ""
     assert "exists but is empty" in caplog.text
@@ -43,17 +49,21 @@ def test_get_last_processed_file_file_not_found(temp_dir, caplog):
 
 
 def test_get_last_processed_file_oserror(monkeypatch):
-    monkeypatch.setattr("os.path.exists", lambda _: True)
-
     def mock_open(*args, **kwargs):
         raise OSError("Test error")
 
-    monkeypatch.setattr("builtins.open", mock_open)
+    monkeypatch.setattr("app.file_process.file_manager.open", mock_open, raising=False)
 
     with pytest.raises(RuntimeError):
         FileManager.get_last_processed_file("fake_path.txt")
 
 
+def test_get_last_processed_file_directory_path(tmp_path):
+    """Should raise RuntimeError when the record path points to a directory."""
+    with pytest.raises(RuntimeError, match="Error reading file"):
+        FileManager.get_last_processed_file(str(tmp_path))
+
+
 
 # ---------- SET TESTS ----------
 
@@ -62,18 +72,25 @@ def test_set_last_processed_file_creates_file(temp_dir):
     file_path = os.path.join(temp_dir, "record.txt")
     FileManager.set_last_processed_file("data.csv", file_path)
 
-    with open(file_path) as f:
-        content = f.read()
-
-    assert content == "data.csv"
-
-
-def test_set_last_processed_file_invalid_filename(temp_dir):
-    """Should raise ValueError when filename does not match the expected CSV pattern."""
+    assert Path(file_path).read_text() == "data.csv"
+
+
+@pytest.mark.parametrize(
+    ("filename", "pattern"),
+    [
+        ("invalid.txt", DEFAULT_FILENAME_PATTERN),
+        ("bad_name\n.csv", DEFAULT_FILENAME_PATTERN),
+        ("bad name.txt", DEFAULT_FILENAME_PATTERN),
+        ("file.json", DEFAULT_FILENAME_PATTERN),
+        ("data.csv", r"^[\w\-.]+\.txt$"),
+    ],
+)
+def test_set_last_processed_file_invalid_filename(temp_dir, filename, pattern):
+    """Should raise ValueError when filename does not match the expected pattern."""
     file_path = os.path.join(temp_dir, "record.txt")
 
     with pytest.raises(ValueError, match="Invalid filename format"):
-        FileManager.set_last_processed_file("invalid.txt", file_path)
+        FileManager.set_last_processed_file(filename, file_path, filename_pattern=pattern)
 
 
 def test_set_last_processed_file_creates_missing_dir(temp_dir):
@@ -92,9 +109,21 @@ def test_set_last_processed_file_oserror(monkeypatch, temp_dir):
     def mock_open(*args, **kwargs):
         raise OSError("Test write error")
 
-    monkeypatch.setattr("builtins.open", mock_open)
+    monkeypatch.setattr("app.file_process.file_manager.open", mock_open, raising=False)
 
     file_path = os.path.join(temp_dir, "record.txt")
 
     with pytest.raises(OSError, match="Error writing file"):
         FileManager.set_last_processed_file("data.csv", file_path)
+
+
+def test_set_last_processed_file_recreates_removed_dir(temp_dir):
+    """Should recreate a cached directory that was removed between writes."""
+    sub_dir = os.path.join(temp_dir, "removed")
+    file_path = os.path.join(sub_dir, "record.txt")
+
+    FileManager.set_last_processed_file("data.csv", file_path)
+    shutil.rmtree(sub_dir)
+
+    FileManager.set_last_processed_file("next.csv", file_path)
+    assert Path(file_path).read_text() == "next.csv"
@@ -1,12 +1,14 @@
 import os
 import json
+import pickle
 import pytest
 import pandas as pd
-import joblib
 import numpy as np
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
+from pathlib import Path
 from unittest.mock import patch
 
+from app.file_process import report_generator
 from app.file_process.report_generator import (
     ReportGenerator,
     DataProcessor,
@@ -24,8 +26,8 @@ class DummySuccessModel:
     """
 
     def predict(self, X):
-        values = X.values.reshape(-1)   # always 1D
-        return np.array([-1 if float(v) > 500 else 1 for v in values], dtype=int)
+        values = np.asarray(X.values, dtype=np.float64).reshape(-1)   # always 1D
+        return np.where(values > 500.0, -1, 1).astype(np.int64, copy=False)
 
 
 class FakeModel:
@@ -40,13 +42,44 @@ class RaisingModel:
         raise Exception("predict failed")
 
 
+# Stateless models, so the pickled bundle can be built once at import time.
+_SUCCESS_BUNDLE_BYTES = pickle.dumps(
+    {"Carbonated Drink": DummySuccessModel(), "Fruit Juice": RaisingModel()},
+    protocol=pickle.HIGHEST_PROTOCOL,
+)
+
+_EXPECTED_AA_AB = (CATEGORY_MAPPING["AA"], CATEGORY_MAPPING["AB"])
+
+
+def _dump_bundle(path):
+    """Writes the pre-pickled model bundle; joblib.load reads plain pickles."""
+    path.write_bytes(_SUCCESS_BUNDLE_BYTES)
+
+
+@pytest.fixture
+def fake_models(monkeypatch):
+    """In-memory model registry keyed by model file name, replacing joblib.load.
+
+    Tests still create the (empty) model file so the path-exists check passes.
+    """
+    registry = {}
+    monkeypatch.setattr("joblib.load", lambda path: registry[Path(path).name])
+    return registry
+
+
+@pytest.fixture(scope="session")
+def model_bundle_path(tmp_path_factory):
+    """A real pickled model bundle, written once and shared by on-disk loading tests."""
+    path = tmp_path_factory.mktemp("models") / "bundle.pkl"
+    _dump_bundle(path)
+    return str(path)
+
+
 # ================================================================================
 #  DataProcessor tests
 # ================================================================================
 
 def test_filter_data_applies_function(caplog):
-    caplog.set_level("INFO")
-
     df = pd.DataFrame({"A": [1, 2, 3]})
     out = DataProcessor.filter_data(df, lambda d: d[d["A"] > 1])
 
@@ -54,9 +87,35 @@ def test_filter_data_applies_function(caplog):
     assert "Applying custom data filter" in caplog.text
 
 
-def test_filter_data_no_function(caplog):
-    caplog.set_level("INFO")
+def test_filter_data_applies_comparison_tuple(caplog):
+    df = pd.DataFrame({"A": [1, 2, 3], "B": ["x", "y", "z"]})
+    out = DataProcessor.filter_data(df, ("A", "gt", 1))
+
+    assert out["B"].tolist() == ["y", "z"]
+    assert "Applying filter" in caplog.text
+
+
+def test_filter_data_comparison_tuple_on_datetime_column():
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(["2025-01-10", "2025-01-15", "2025-01-20"]),
+        "Region": pd.Categorical(["North", "South", "North"]),
+    })
+
+    by_date = DataProcessor.filter_data(df, ("Date", "ge", "2025-01-15"))
+    by_region = DataProcessor.filter_data(df, ("Region", "eq", "North"))
+
+    assert by_date["Region"].tolist() == ["South", "North"]
+    assert by_region["Date"].dt.day.tolist() == [10, 20]
 
+
+def test_filter_data_unsupported_op():
+    df = pd.DataFrame({"A": [1, 2, 3]})
+
+    with pytest.raises(ValueError, match="Unsupported filter op"):
+        DataProcessor.filter_data(df, ("A", "between", 1))
+
+
+def test_filter_data_no_function(caplog):
     df = pd.DataFrame({"A": [1, 2, 3]})
     out = DataProcessor.filter_data(df, None)
 
@@ -65,73 +124,93 @@ def test_filter_data_no_function(caplog):
 
 
 def test_map_categories_creates_mapped_column(caplog):
-    caplog.set_level("INFO")
-
     df = pd.DataFrame({"Product Category": ["AA", "AB"]})
     out = DataProcessor.map_categories(df)
 
-    assert out["Product Category Mapped"].tolist() == [
-        CATEGORY_MAPPING["AA"],
-        CATEGORY_MAPPING["AB"],
-    ]
+    assert tuple(out["Product Category Mapped"]) == _EXPECTED_AA_AB
     assert "Product categories mapped" in caplog.text
 
 
+def test_map_categories_unknown_code_is_nan():
+    df = pd.DataFrame({"Product Category": ["AA", "ZZ"]})
+    out = DataProcessor.map_categories(df)
+
+    assert isinstance(out["Product Category"].dtype, pd.CategoricalDtype)
+    assert out["Product Category Mapped"].iloc[0] == CATEGORY_MAPPING["AA"]
+    assert pd.isna(out["Product Category Mapped"].iloc[1])
+
+
 # ================================================================================
 #  Fixtures for CSV files
 # ================================================================================
 
-@pytest.fixture
-def csv_files(tmp_path):
-    d = tmp_path
+@pytest.fixture(scope="module")
+def csv_files(tmp_path_factory):
+    """Two read-only CSV files, written once for the whole module."""
+    d = tmp_path_factory.mktemp("csvs")
     f1 = d / "f1.csv"
     f2 = d / "f2.csv"
 
-    pd.DataFrame({
-        "Date": ["2025-01-01"],
-        "Region": ["North"],
-        "Product Category": ["AA"],
-        "Product": ["Cola"],
-        "Sales": [100],
-    }).to_csv(f1, index=False)
+    f1.write_text("Date,Region,Product Category,Product,Sales\n2025-01-01,North,AA,Cola,100\n")
 
-    pd.DataFrame({
-        "Date": ["2025-01-02"],
-        "Region": ["South"],
-        "Product Category": ["AB"],
-        "Product": ["Oat"],
-        "Sales": [200],
-    }).to_csv(f2, index=False)
+    f2.write_text("Date,Region,Product Category,Product,Sales\n2025-01-02,South,AB,Oat,200\n")
 
     return str(d), ["f1.csv", "f2.csv"]
 
 
+def test_read_sales_files_preserves_order(csv_files):
+    directory, files = csv_files
+    frames = DataProcessor.read_sales_files(directory, list(reversed(files)))
+
+    assert [f["Product"].iloc[0] for f in frames] == ["Oat", "Cola"]
+    assert pd.api.types.is_datetime64_any_dtype(frames[0]["Date"])
+
+
+def test_read_sales_files_with_pyarrow_engine(csv_files):
+    pytest.importorskip("pyarrow")
+    assert report_generator._CSV_ENGINE == "pyarrow"
+
+    directory, files = csv_files
+    frames = DataProcessor.read_sales_files(directory, files)
+
+    for frame in frames:
+        assert pd.api.types.is_datetime64_any_dtype(frame["Date"])
+        assert isinstance(frame["Region"].dtype, pd.CategoricalDtype)
+        assert isinstance(frame["Product Category"].dtype, pd.CategoricalDtype)
+
+
+def test_read_sales_files_empty_list():
+    assert DataProcessor.read_sales_files("unused", []) == []
+
+
 # ================================================================================
 #  create_first_dataframe (success + failing path)
 # ================================================================================
 
 def test_create_first_dataframe_success(csv_files, caplog):
-    caplog.set_level("INFO")
-
     directory, files = csv_files
     rg = ReportGenerator.create_first_dataframe(directory, files)
 
     assert rg.report_dataframe.shape[0] == 2
     assert "Product Category Mapped" in rg.report_dataframe.columns
+    assert isinstance(rg.report_dataframe["Region"].dtype, pd.CategoricalDtype)
     assert "Created initial report DataFrame" in caplog.text
 
 
-def test_create_first_dataframe_initial_anomaly_detection_exception(tmp_path, caplog):
-    caplog.set_level("ERROR")
+def test_concat_frames_keeps_categoricals():
+    first = pd.DataFrame({"Region": pd.Categorical(["North"]), "Sales": [1.0]})
+    second = pd.DataFrame({"Region": pd.Categorical(["South"]), "Sales": [2.0]})
+
+    out = DataProcessor.concat_frames([first, second])
+
+    assert isinstance(out["Region"].dtype, pd.CategoricalDtype)
+    assert out["Region"].tolist() == ["North", "South"]
+    assert out.index.tolist() == [0, 1]
 
+
+def test_create_first_dataframe_initial_anomaly_detection_exception(tmp_path, caplog):
     csv_file = tmp_path / "init.csv"
-    pd.DataFrame({
-        "Date": ["2025-01-01"],
-        "Region": ["N"],
-        "Product Category": ["AA"],
-        "Product": ["Cola"],
-        "Sales": [100],
-    }).to_csv(csv_file, index=False)
+    csv_file.write_text("Date,Region,Product Category,Product,Sales\n2025-01-01,N,AA,Cola,100\n")
 
     with patch.object(ReportGenerator, "generate_report", side_effect=Exception("boom")):
         ReportGenerator.create_first_dataframe(str(tmp_path), ["init.csv"])
@@ -144,8 +223,6 @@ def test_create_first_dataframe_initial_anomaly_detection_exception(tmp_path, ca
 # ================================================================================
 
 def test_update_dataframe_success(tmp_path, caplog):
-    caplog.set_level("INFO")
-
     initial = pd.DataFrame({
         "Date": ["2025-01-01"],
         "Region": ["North"],
@@ -159,13 +236,7 @@ def test_update_dataframe_success(tmp_path, caplog):
     rg = ReportGenerator(initial)
 
     new_file = tmp_path / "new.csv"
-    pd.DataFrame({
-        "Date": ["2025-01-03"],
-        "Region": ["South"],
-        "Product Category": ["AB"],
-        "Product": ["Oat"],
-        "Sales": [200],
-    }).to_csv(new_file, index=False)
+    new_file.write_text("Date,Region,Product Category,Product,Sales\n2025-01-03,South,AB,Oat,200\n")
 
     rg.update_dataframe(str(tmp_path), ["new.csv"])
 
@@ -174,8 +245,6 @@ def test_update_dataframe_success(tmp_path, caplog):
 
 
 def test_update_dataframe_no_new_files(tmp_path, caplog):
-    caplog.set_level("WARNING")
-
     rg = ReportGenerator(
         pd.DataFrame({"Date": ["2025-01-01"], "Sales": [10], "Product Category": ["AA"]})
     )
@@ -186,8 +255,6 @@ def test_update_dataframe_no_new_files(tmp_path, caplog):
 
 
 def test_update_dataframe_anomaly_recalc_exception(tmp_path, caplog):
-    caplog.set_level("ERROR")
-
     initial = pd.DataFrame({
         "Date": ["2025-01-01"],
         "Region": ["North"],
@@ -200,13 +267,7 @@ def test_update_dataframe_anomaly_recalc_exception(tmp_path, caplog):
     rg = ReportGenerator(initial)
 
     new_file = tmp_path / "new.csv"
-    pd.DataFrame({
-        "Date": ["2025-01-02"],
-        "Region": ["South"],
-        "Product Category": ["AB"],
-        "Product": ["Tea"],
-        "Sales": [200],
-    }).to_csv(new_file, index=False)
+    new_file.write_text("Date,Region,Product Category,Product,Sales\n2025-01-02,South,AB,Tea,200\n")
 
     with patch.object(ReportGenerator, "generate_report", side_effect=Exception("boom")):
         rg.update_dataframe(str(tmp_path), ["new.csv"])
@@ -218,112 +279,119 @@ def test_update_dataframe_anomaly_recalc_exception(tmp_path, caplog):
 #  _detect_anomalies tests — all branches
 # ================================================================================
 
-def test_detect_anomalies_missing_model(tmp_path, caplog):
-    caplog.set_level("ERROR")
+# One-row prototype shared by the branch tests; copied or assigned per test.
+_PROTO_ANOM = pd.DataFrame({
+    "Product Category Mapped": ["Carbonated Drink"],
+    "Sales": [100],
+    "Date": ["2025-01-01"],
+})
 
-    df = pd.DataFrame({
-        "Product Category Mapped": ["Carbonated Drink"],
-        "Sales": [100],
-        "Date": ["2025-01-01"],
-    })
-
-    rg = ReportGenerator(df)
-    rg._detect_anomalies(str(tmp_path / "nope.pkl"))
 
-    assert "Model file not found" in caplog.text
-    assert rg.report_dataframe["is_anomaly"].tolist() == [0]
+def _no_model_file(tmp_path, request):
+    return tmp_path / "nope.pkl"
 
 
-def test_detect_anomalies_empty_model_file(tmp_path, caplog):
-    caplog.set_level("WARNING")
+def _registered(bundle):
+    """Setup that serves ``bundle`` from the in-memory model registry."""
+    def setup(tmp_path, request):
+        model_path = tmp_path / "model.pkl"
+        model_path.touch()
+        request.getfixturevalue("fake_models")["model.pkl"] = bundle
+        return model_path
+    return setup
 
-    df = pd.DataFrame({
-        "Product Category Mapped": ["Milkshake"],
-        "Sales": [200],
-        "Date": ["2025-01-01"],
-    })
-
-    rg = ReportGenerator(df)
 
-    model_path = tmp_path / "empty.pkl"
-    joblib.dump({}, model_path)
-
-    rg._detect_anomalies(str(model_path))
-
-    assert "invalid" in caplog.text.lower()
-    assert rg.report_dataframe["is_anomaly"].tolist() == [0]
-
-
-def test_detect_anomalies_missing_category_mapping(tmp_path, caplog):
-    caplog.set_level("WARNING")
-
-    df = pd.DataFrame({"Sales": [10], "Date": ["2025-01-01"]})
-    rg = ReportGenerator(df)
-
-    model_path = tmp_path / "dummy.pkl"
-    joblib.dump({"AA": DummySuccessModel()}, model_path)
-
-    rg._detect_anomalies(str(model_path))
+def _bundle_on_disk(tmp_path, request):
+    return request.getfixturevalue("model_bundle_path")
 
-    assert "Missing column 'Product Category Mapped'" in caplog.text
 
+def _broken_model_file(tmp_path, request):
+    """Model file exists, but joblib.load fails on it."""
+    model_path = tmp_path / "broken_model.pkl"
+    model_path.write_text("dummy content")
 
-def test_detect_anomalies_prediction_exception(tmp_path, caplog):
-    caplog.set_level("ERROR")
-
+    def broken_load(path):
+        raise Exception("corrupted file")
+
+    request.getfixturevalue("monkeypatch").setattr("joblib.load", broken_load)
+    return model_path
+
+
+_DETECT_SCENARIOS = [
+    pytest.param(_PROTO_ANOM, _no_model_file, "Model file not found", [0], id="missing_model"),
+    pytest.param(
+        _PROTO_ANOM.assign(**{"Product Category Mapped": "Milkshake", "Sales": 200}),
+        _registered({}), "Loaded model file is empty or invalid", [0], id="empty_model_file",
+    ),
+    pytest.param(
+        _PROTO_ANOM.drop(columns="Product Category Mapped").assign(Sales=10),
+        _registered({"AA": DummySuccessModel()}), "Missing column 'Product Category Mapped'", [0],
+        id="missing_category_mapping",
+    ),
+    pytest.param(
+        _PROTO_ANOM.assign(**{"Product Category Mapped": "Fruit Juice", "Sales": 50}),
+        _registered({"Fruit Juice": RaisingModel()}), "Error predicting anomalies", [0], id="prediction_exception",
+    ),
+    pytest.param(
+        _PROTO_ANOM.assign(Sales=150),
+        _registered({"SomeOtherCategory": FakeModel()}), "No model found for category 'Carbonated Drink'", [0],
+        id="no_model_for_category",
+    ),
+    pytest.param(
+        pd.concat([_PROTO_ANOM.assign(Sales=10), _PROTO_ANOM.assign(Sales=999)], ignore_index=True),
+        _bundle_on_disk, "Total anomalies detected", [0, 1], id="success",
+    ),
+    pytest.param(_PROTO_ANOM, _broken_model_file, "Error loading model from", [0], id="model_load_error"),
+]
+
+
+@pytest.mark.parametrize(("frame", "setup", "expected_log", "expected_flags"), _DETECT_SCENARIOS)
+def test_detect_anomalies(frame, setup, expected_log, expected_flags, tmp_path, request, caplog):
+    rg = ReportGenerator(frame.copy(deep=False))
+    rg._detect_anomalies(str(setup(tmp_path, request)))
+
+    assert expected_log in caplog.text
+    assert rg.report_dataframe["is_anomaly"].tolist() == expected_flags
+
+
+def test_detect_anomalies_keeps_flags_of_unmodelled_rows(tmp_path, fake_models):
     df = pd.DataFrame({
-        "Product Category Mapped": ["Fruit Juice"],
-        "Sales": [50],
-        "Date": ["2025-01-01"],
+        "Product Category Mapped": ["Milkshake", "Carbonated Drink", "Milkshake", "Carbonated Drink"],
+        "Sales": [10, 999, 20, 30],
+        "Date": ["2025-01-01"] * 4,
+        "is_anomaly": [1, 0, np.nan, np.nan],
     })
 
     rg = ReportGenerator(df)
 
-    model_path = tmp_path / "bad.pkl"
-    joblib.dump({"Fruit Juice": RaisingModel()}, model_path)
-
-    rg._detect_anomalies(str(model_path))
-
-    assert "Error predicting anomalies" in caplog.text
-    assert rg.report_dataframe["is_anomaly"].tolist() == [0]
-
-
-def test_detect_anomalies_no_model_for_category(tmp_path, caplog):
-    caplog.set_level("WARNING")
-
-    df = pd.DataFrame({
-        "Product Category Mapped": ["Carbonated Drink"],
-        "Sales": [150],
-        "Date": ["2025-01-01"],
-    })
-    rg = ReportGenerator(df)
-
-    model_path = tmp_path / "model.pkl"
-    joblib.dump({"SomeOtherCategory": FakeModel()}, model_path)
+    model_path = tmp_path / "good.pkl"
+    model_path.touch()
+    fake_models["good.pkl"] = {"Carbonated Drink": DummySuccessModel()}
 
     rg._detect_anomalies(str(model_path))
 
-    assert "No model found for category 'Carbonated Drink'" in caplog.text
+    assert rg.report_dataframe["is_anomaly"].tolist() == [1, 1, 0, 0]
 
 
-def test_detect_anomalies_success(tmp_path, caplog):
-    caplog.set_level("INFO")
+def test_detect_anomalies_reuses_cached_models(tmp_path):
+    import joblib  # only this test needs the real loader; the SUT imports it lazily too
 
-    df = pd.DataFrame({
-        "Product Category Mapped": ["Carbonated Drink", "Carbonated Drink"],
-        "Sales": [10, 999],
-        "Date": ["2025-01-01", "2025-01-01"],
-    })
+    rg = ReportGenerator(_PROTO_ANOM.assign(Sales=999))
 
-    rg = ReportGenerator(df)
+    model_path = tmp_path / "cached.pkl"
+    _dump_bundle(model_path)
 
-    model_path = tmp_path / "good.pkl"
-    joblib.dump({"Carbonated Drink": DummySuccessModel()}, model_path)
+    with patch("joblib.load", wraps=joblib.load) as load:
+        rg._detect_anomalies(str(model_path))
+        rg._detect_anomalies(str(model_path))
+        assert load.call_count == 1
 
-    rg._detect_anomalies(str(model_path))
+        stat = model_path.stat()
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        rg._detect_anomalies(str(model_path))
+        assert load.call_count == 2
 
-    assert rg.report_dataframe["is_anomaly"].tolist() == [0, 1]
-    assert "Total anomalies detected" in caplog.text
+    assert rg.report_dataframe["is_anomaly"].tolist() == [1]
 
 
 # ================================================================================
@@ -331,8 +399,6 @@ def test_detect_anomalies_success(tmp_path, caplog):
 # ================================================================================
 
 def test_generate_report_no_anomalies(caplog):
-    caplog.set_level("INFO")
-
     today = date.today()
     df = pd.DataFrame({
         "Date": [today],
@@ -350,8 +416,6 @@ def test_generate_report_no_anomalies(caplog):
 
 
 def test_generate_report_detects_anomalies(caplog):
-    caplog.set_level("INFO")
-
     today = date.today()
     df = pd.DataFrame({
         "Date": [today],
@@ -367,7 +431,68 @@ def test_generate_report_detects_anomalies(caplog):
 
     assert report["today_anomalies"]["total_anomalies"] == 1
     assert "Today's anomalies detected" in caplog.text
+    assert report["today_anomalies"]["records"] == [{
+        "Date": today,
+        "Region": "S",
+        "Product Category Mapped": "Fruit Juice",
+        "Product": "X",
+        "Sales": 500,
+        "is_anomaly": 1,
+    }]
+
 
+def test_generate_report_excludes_rows_outside_window():
+    today = date.today()
+    df = pd.DataFrame({
+        "Date": [today - timedelta(days=31), today - timedelta(days=30), today + timedelta(days=1)],
+        "Region": ["N", "N", "N"],
+        "Product Category Mapped": ["Milkshake", "Milkshake", "Milkshake"],
+        "Product": ["X", "Y", "Z"],
+        "Sales": [1000, 10, 20],
+        "is_anomaly": [1, 0, 1],
+    })
+
+    report = ReportGenerator(df).generate_report(run_anomaly_detection=False)
+
+    assert report["beverage_report_total"] == {"Milkshake": 30}
+    assert report["today_anomalies"]["total_anomalies"] == 0
+
+
+def test_generate_report_scores_only_rows_in_window(tmp_path, fake_models):
+    today = date.today()
+    df = pd.DataFrame({
+        "Date": [today - timedelta(days=60), today],
+        "Region": ["N", "N"],
+        "Product Category Mapped": ["Carbonated Drink", "Carbonated Drink"],
+        "Product": ["Old", "New"],
+        "Sales": [999, 999],
+    })
+
+    model_path = tmp_path / "window.pkl"
+    model_path.touch()
+    fake_models["window.pkl"] = {"Carbonated Drink": DummySuccessModel()}
+
+    rg = ReportGenerator(df)
+    report = rg.generate_report(model_path=str(model_path))
+
+    assert rg.report_dataframe["is_anomaly"].tolist() == [0, 1]
+    assert report["today_anomalies"]["total_anomalies"] == 1
+
+
+def test_generate_report_only_observed_categories():
+    today = date.today()
+    df = DataProcessor.map_categories(pd.DataFrame({
+        "Date": [today, today],
+        "Region": ["N", "N"],
+        "Product Category": ["AA", "AA"],
+        "Sales": [100, 300],
+        "is_anomaly": [0, 0],
+    }))
+
+    report = ReportGenerator(df).generate_report(run_anomaly_detection=False)
+
+    assert report["beverage_report_total"] == {"Carbonated Drink": 400}
+    assert report["beverage_report_mean"] == {"Carbonated Drink": 200.0}
 
 
 # ================================================================================
@@ -386,34 +511,62 @@ def test_save_report_success(tmp_path):
         assert json.load(f)["ok"] is True
 
 
-def test_save_report_failure(tmp_path):
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "json"])
+def test_save_report_non_string_keys(tmp_path, monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr("app.file_process.report_generator.orjson", None)
     rg = ReportGenerator(pd.DataFrame({"x": [1]}))
-    rg.report_dict = {"fail": True}
+    rg.report_dict = {"totals": {1: 10, date(2025, 1, 1): 20}}
 
-    with patch("builtins.open", side_effect=Exception("boom")):
-        with pytest.raises(Exception):
-            rg.save_report(str(tmp_path / "no.json"))
+    out = tmp_path / "out.json"
+    rg.save_report(str(out))
 
-def test_detect_anomalies_model_load_error(tmp_path, caplog):
-    """Covers: except Exception during joblib.load (model file exists)."""
-    caplog.set_level("ERROR")
+    assert json.loads(out.read_text()) == {"totals": {"1": 10, "2025-01-01": 20}}
 
-    # --- dataframe ---
-    df = pd.DataFrame({
-        "Product Category Mapped": ["Carbonated Drink"],
-        "Sales": [100],
-        "Date": ["2025-01-01"]
-    })
-    rg = ReportGenerator(df)
 
-    # --- create dummy placeholder file so path.exists() == True ---
-    model_path = tmp_path / "broken_model.pkl"
-    model_path.write_text("dummy content")
+def test_save_report_without_orjson(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.file_process.report_generator.orjson", None)
+
+    rg = ReportGenerator(pd.DataFrame({"x": [1]}))
+    rg.report_dict = {"ok": True, "day": date(2025, 1, 1)}
+
+    out = tmp_path / "out.json"
+    rg.save_report(str(out))
+
+    assert json.loads(out.read_text()) == {"ok": True, "day": "2025-01-01"}
 
-    # --- force joblib.load to fail WHILE file exists ---
-    with patch("joblib.load", side_effect=Exception("corrupted file")):
-        rg._detect_anomalies(str(model_path))
 
-    # --- assertions ---
-    assert "Error loading model from" in caplog.text
-    assert rg.report_dataframe["is_anomaly"].tolist() == [0]
+def test_save_report_same_layout_with_and_without_orjson(tmp_path, monkeypatch):
+    pytest.importorskip("orjson")
+    rg = ReportGenerator(pd.DataFrame({"x": [1]}))
+    rg.report_dict = {
+        "region_report_mean": {"North": 10.5},
+        "beverage_report_total": {date(2025, 1, 1): np.int64(20)},
+        "today_anomalies": {"records": [
+            {"Date": date(2025, 1, 1), "Product Category Mapped": np.nan, "Sales": np.float64(600.0)},
+            {"Date": pd.Timestamp("2025-01-01 08:30"), "Product Category Mapped": "Milkshake", "Sales": float("inf")},
+        ]},
+    }
+
+    with_orjson = tmp_path / "with.json"
+    rg.save_report(str(with_orjson))
+    monkeypatch.setattr("app.file_process.report_generator.orjson", None)
+    without_orjson = tmp_path / "without.json"
+    rg.save_report(str(without_orjson))
+
+    assert with_orjson.read_text() == without_orjson.read_text()
+    saved = json.loads(without_orjson.read_text())
+    assert saved["beverage_report_total"] == {"2025-01-01": 20}
+    assert saved["today_anomalies"]["records"][0]["Product Category Mapped"] is None
+    assert saved["today_anomalies"]["records"][1]["Sales"] is None
+
+
+def test_save_report_failure(tmp_path):
+    rg = ReportGenerator(pd.DataFrame({"x": [1]}))
+    rg.report_dict = {"fail": True}
+
+    with patch("builtins.open", side_effect=Exception("boom")):
+        with pytest.raises(Exception):
+            rg.save_report(str(tmp_path / "no.json"))
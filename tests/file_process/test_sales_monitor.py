@@ -21,12 +21,10 @@ def test_extract_date_from_filename_invalid():
 #  _get_files_since — directory missing → WARNING
 # ==========================================================
 def test_get_files_since_missing_directory(caplog):
-    caplog.set_level("WARNING")
-
     monitor = SalesMonitor(directory="NO_SUCH_DIR", record_file_path="dummy.txt")
     result = monitor._get_files_since(None)
 
-    assert result == {}
+    assert result is None
     assert "Directory not found" in caplog.text
 
 
@@ -34,28 +32,38 @@ def test_get_files_since_missing_directory(caplog):
 #  _get_files_since — generic error → ERROR
 # ==========================================================
 def test_get_files_since_generic_error(caplog, tmp_path, monkeypatch):
-    caplog.set_level("ERROR")
-
     monitor = SalesMonitor(directory=str(tmp_path), record_file_path="dummy.txt")
 
-    def broken_listdir(_):
+    def broken_scandir(_):
         raise Exception("boom")
 
-    monkeypatch.setattr("os.listdir", broken_listdir)
+    monkeypatch.setattr("os.scandir", broken_scandir)
 
     result = monitor._get_files_since(None)
 
-    assert result == {}
+    assert result is None
     assert "Error reading directory" in caplog.text
 
 
+# ==========================================================
+#  _get_files_since — only regular files are returned
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+def test_get_files_since_skips_directories(tmp_path):
+    (tmp_path / "2025-01-01.csv").write_text("x\n1\n")
+    (tmp_path / "2025-01-02.csv").mkdir()
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path="dummy.txt")
+    result = monitor._get_files_since(None)
+
+    assert list(result) == ["2025-01-01.csv"]
+
+
 # ==========================================================
 #  fill — no CSV files → WARNING
 # ==========================================================
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 def test_fill_no_files(caplog, tmp_path):
-    caplog.set_level("WARNING")
-
     monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
     monitor.fill()
 
@@ -69,8 +77,6 @@ def test_fill_no_files(caplog, tmp_path):
 @patch("app.file_process.sales_monitor.FileManager.set_last_processed_file")
 @patch("app.file_process.sales_monitor.ReportGenerator")
 def test_fill_success(mock_rg, mock_set, tmp_path, caplog):
-    caplog.set_level("INFO")
-
     # create test CSV
     csv_file = tmp_path / "2025-01-01.csv"
     pd.DataFrame({"x": [1]}).to_csv(csv_file, index=False)
@@ -92,8 +98,6 @@ def test_fill_success(mock_rg, mock_set, tmp_path, caplog):
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 @patch("app.file_process.sales_monitor.ReportGenerator.create_first_dataframe")
 def test_fill_generator_exception(mock_create, tmp_path, caplog):
-    caplog.set_level("ERROR")
-
     csv_file = tmp_path / "2025-01-01.csv"
     pd.DataFrame({"x": [1]}).to_csv(csv_file, index=False)
 
@@ -111,8 +115,6 @@ def test_fill_generator_exception(mock_create, tmp_path, caplog):
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 @patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
 def test_process_no_new_files(mock_last, tmp_path, caplog):
-    caplog.set_level("INFO")
-
     df = pd.DataFrame({"x": [1]})
     df.to_csv(tmp_path / "2025-01-01.csv", index=False)
 
@@ -131,8 +133,6 @@ def test_process_no_new_files(mock_last, tmp_path, caplog):
 @patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
 @patch("app.file_process.sales_monitor.FileManager.set_last_processed_file")
 def test_process_new_files_success(mock_set, mock_last, tmp_path, caplog):
-    caplog.set_level("INFO")
-
     df = pd.DataFrame({"x": [1]})
     df.to_csv(tmp_path / "2025-01-01.csv", index=False)
     df.to_csv(tmp_path / "2025-01-10.csv", index=False)
@@ -155,8 +155,6 @@ def test_process_new_files_success(mock_set, mock_last, tmp_path, caplog):
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 @patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
 def test_process_update_dataframe_exception(mock_last, tmp_path, caplog):
-    caplog.set_level("ERROR")
-
     df = pd.DataFrame({"x": [1]})
     df.to_csv(tmp_path / "2025-01-01.csv", index=False)
     df.to_csv(tmp_path / "2025-01-10.csv", index=False)
@@ -172,13 +170,115 @@ def test_process_update_dataframe_exception(mock_last, tmp_path, caplog):
     assert "Error while processing new files" in caplog.text
 
 
+# ==========================================================
+#  process_new_files — already seen files are skipped
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+@patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
+@patch("app.file_process.sales_monitor.FileManager.set_last_processed_file")
+def test_process_new_files_skips_seen_files(mock_set, mock_last, tmp_path):
+    df = pd.DataFrame({"x": [1]})
+    df.to_csv(tmp_path / "2025-01-10.csv", index=False)
+    df.to_csv(tmp_path / "2025-01-11.csv", index=False)
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
+    monitor.all_files = {"2025-01-10.csv": datetime(2025, 1, 10)}
+    mock_rg = MagicMock()
+    monitor.report_generator = mock_rg
+
+    monitor.process_new_files()
+
+    mock_rg.update_dataframe.assert_called_once_with(str(tmp_path), ["2025-01-11.csv"])
+    assert set(monitor.all_files) == {"2025-01-10.csv", "2025-01-11.csv"}
+
+
+# ==========================================================
+#  process_new_files — last processed date is cached
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+@patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
+@patch("app.file_process.sales_monitor.FileManager.set_last_processed_file")
+def test_process_new_files_caches_last_processed_date(mock_set, mock_last, tmp_path):
+    pd.DataFrame({"x": [1]}).to_csv(tmp_path / "2025-01-10.csv", index=False)
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
+    monitor.report_generator = MagicMock()
+
+    monitor.process_new_files()
+    monitor.process_new_files()
+
+    mock_last.assert_called_once()
+    assert monitor._last_processed_date == datetime(2025, 1, 10)
+
+
+# ==========================================================
+#  process_new_files — unchanged directory skips the scan
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+@patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
+def test_process_new_files_skips_unchanged_directory(mock_last, tmp_path, caplog):
+    pd.DataFrame({"x": [1]}).to_csv(tmp_path / "2025-01-01.csv", index=False)
+    old_mtime_ns = os.stat(tmp_path).st_mtime_ns - 10_000_000_000
+    os.utime(tmp_path, ns=(old_mtime_ns, old_mtime_ns))
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
+    monitor.report_generator = MagicMock()
+    monitor.process_new_files()
+
+    with patch("os.scandir") as mock_scandir:
+        monitor.process_new_files()
+
+    mock_scandir.assert_not_called()
+    assert "Directory unchanged since last scan" in caplog.text
+
+
+# ==========================================================
+#  process_new_files — failed scan is retried on the next poll
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+@patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
+@patch("app.file_process.sales_monitor.FileManager.set_last_processed_file")
+def test_process_new_files_rescans_after_failed_scan(mock_set, mock_last, tmp_path):
+    pd.DataFrame({"x": [1]}).to_csv(tmp_path / "2025-01-10.csv", index=False)
+    old_mtime_ns = os.stat(tmp_path).st_mtime_ns - 10_000_000_000
+    os.utime(tmp_path, ns=(old_mtime_ns, old_mtime_ns))
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
+    mock_rg = MagicMock()
+    monitor.report_generator = mock_rg
+
+    with patch("os.scandir", side_effect=PermissionError("denied")):
+        monitor.process_new_files()
+    mock_rg.update_dataframe.assert_not_called()
+
+    monitor.process_new_files()
+
+    mock_rg.update_dataframe.assert_called_once_with(str(tmp_path), ["2025-01-10.csv"])
+
+
+# ==========================================================
+#  process_new_files — failed update leaves files unseen
+# ==========================================================
+@patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
+@patch("app.file_process.sales_monitor.FileManager.get_last_processed_file", return_value="2025-01-01.csv")
+def test_process_new_files_failure_keeps_files_pending(mock_last, tmp_path):
+    pd.DataFrame({"x": [1]}).to_csv(tmp_path / "2025-01-10.csv", index=False)
+
+    monitor = SalesMonitor(directory=str(tmp_path), record_file_path=str(tmp_path / "rec.txt"))
+    mock_rg = MagicMock()
+    mock_rg.update_dataframe.side_effect = Exception("fail")
+    monitor.report_generator = mock_rg
+
+    monitor.process_new_files()
+
+    assert monitor.all_files == {}
+
+
 # ==========================================================
 #  _archive_old_report — success (with cwd fix)
 # ==========================================================
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 def test_archive_old_report_success(tmp_path, caplog, monkeypatch):
-    caplog.set_level("INFO")
-
     json_file = tmp_path / "sales_report.json"
     csv_file = tmp_path / "sales_report.csv"
     json_file.write_text("ok")
@@ -193,6 +293,8 @@ def test_archive_old_report_success(tmp_path, caplog, monkeypatch):
     archive = tmp_path / "report_archive"
     assert archive.exists()
     assert any(f.suffix == ".json" for f in archive.iterdir())
+    assert json_file.exists()
+    assert csv_file.exists()
 
 
 # ==========================================================
@@ -200,8 +302,6 @@ def test_archive_old_report_success(tmp_path, caplog, monkeypatch):
 # ==========================================================
 @patch("app.file_process.sales_monitor.SalesMonitor.__post_init__", lambda x: None)
 def test_archive_old_report_copy_exception(tmp_path, caplog, monkeypatch):
-    caplog.set_level("WARNING")
-
     json_file = tmp_path / "sales_report.json"
     json_file.write_text("ok")
 
@@ -209,7 +309,7 @@ def test_archive_old_report_copy_exception(tmp_path, caplog, monkeypatch):
 
     monitor = SalesMonitor(directory=str(tmp_path), record_file_path="rec.txt")
 
-    with patch("shutil.copy2", side_effect=Exception("boom")):
+    with patch("shutil.copyfile", side_effect=Exception("boom")):
         monitor._archive_old_report()
 
     assert "Could not archive previous report" in caplog.text
@@ -217,7 +317,6 @@ def test_archive_old_report_copy_exception(tmp_path, caplog, monkeypatch):
 
 def test_sales_monitor_initialization_exception(caplog):
     """Covers: except Exception during SalesMonitor.__post_init__."""
-    caplog.set_level("ERROR")
 
     # Force fill() to throw an exception
     with patch.object(SalesMonitor, "fill", side_effect=Exception("init failure")):